@@ -1,24 +1,56 @@
+import copy
 import os
 import yaml
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# Prefer the libyaml-backed loader; it is only available when PyYAML was
+# built against libyaml (e.g. the manylinux wheels, or libyaml-dev at build time).
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
 # Load configuration from YAML file
 CONFIG_FILE = os.environ.get("CONFIG_FILE", "config.yaml")
 
-def load_config():
-    """Load configuration from YAML file with fallback to defaults."""
+# Parsed configs keyed by path -> (mtime_ns, size, config), LRU-bounded
+_YAML_CACHE_MAX = 8
+_YAML_CACHE: "OrderedDict[str, Tuple[int, int, Dict[str, Any]]]" = OrderedDict()
+
+def load_config(force: bool = False):
+    """
+    Load configuration from YAML file with fallback to defaults.
+    
+    The parsed file is cached and only re-parsed when its mtime or size
+    changes. Pass force=True to bypass the cache.
+    """
     config_path = Path(CONFIG_FILE)
     
-    if not config_path.exists():
+    try:
+        stat = os.stat(config_path)
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"Configuration file not found: {CONFIG_FILE}\n"
             "Please create config.yaml or set CONFIG_FILE environment variable."
-        )
+        ) from None
+    
+    key = str(config_path.resolve())
+    cached = _YAML_CACHE.get(key)
+    if not force and cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        _YAML_CACHE.move_to_end(key)
+        return copy.deepcopy(cached[2])
     
     with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=_Loader)
+    
+    _YAML_CACHE[key] = (stat.st_mtime_ns, stat.st_size, config)
+    _YAML_CACHE.move_to_end(key)
+    while len(_YAML_CACHE) > _YAML_CACHE_MAX:
+        _YAML_CACHE.popitem(last=False)
     
-    return config
+    return copy.deepcopy(config)
 
 # Load configuration
 _config = load_config()
@@ -26,6 +58,7 @@ _config = load_config()
 # GitHub configuration
 GITHUB_TOKEN = _config.get('github_token')
 GITHUB_ORGS = _config.get('github_orgs', ['deepseek-ai'])
+GITHUB_MAX_WORKERS = _config.get('github_max_workers', 16)
 
 # HuggingFace configuration
 HUGGINGFACE_ORGS = _config.get('huggingface_orgs', ['deepseek-ai'])
@@ -40,5 +73,7 @@ CHECK_INTERVAL = _config.get('check_interval', 60)
 
 # State storage
 STATE_DIR = _config.get('state_dir', 'state')
+STATE_FSYNC_DIR = _config.get('state_fsync_dir', False)
+STATE_COMPRESS = _config.get('state_compress', False)
 GITHUB_STATE_FILE = "github_state.json"
 HUGGINGFACE_STATE_FILE = "huggingface_state.json"
@@ -3,6 +3,10 @@ import logging
 import time
 import signal
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, Any, List
 
 from config import (
@@ -11,7 +15,10 @@ from config import (
     GITHUB_ORGS,
     HUGGINGFACE_ORGS,
     GITHUB_TOKEN,
-    STATE_DIR
+    GITHUB_MAX_WORKERS,
+    STATE_DIR,
+    STATE_FSYNC_DIR,
+    STATE_COMPRESS
 )
 from utils.state_manager import StateManager
 from utils.wechat_notifier import WeChatNotifier
@@ -26,15 +33,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global flag for graceful shutdown
-shutdown_flag = False
+# Set by the signal handler; also wakes the loop out of its inter-cycle wait
+shutdown_event = threading.Event()
 
 
 def signal_handler(signum, frame):
     """Handle shutdown signals."""
-    global shutdown_flag
     logger.info("Received shutdown signal, stopping gracefully...")
-    shutdown_flag = True
+    shutdown_event.set()
 
 
 def main():
@@ -45,12 +51,12 @@ def main():
     logger.info(f"Monitoring HuggingFace orgs: {', '.join(HUGGINGFACE_ORGS)}")
     
     # Initialize components
-    state_manager = StateManager(STATE_DIR)
+    state_manager = StateManager(STATE_DIR, STATE_FSYNC_DIR, STATE_COMPRESS)
     notifier = WeChatNotifier(WECHAT_WEBHOOK_URL)
     
     # Create monitors for each organization
     github_monitors = {
-        org: GitHubMonitor(org, GITHUB_TOKEN)
+        org: GitHubMonitor(org, GITHUB_TOKEN, GITHUB_MAX_WORKERS)
         for org in GITHUB_ORGS
     }
     
@@ -59,18 +65,29 @@ def main():
         for org in HUGGINGFACE_ORGS
     }
     
+    # Resolve state file paths once; they only depend on the org name
+    github_state_paths = {
+        org: state_manager.path_for(monitor.state_file)
+        for org, monitor in github_monitors.items()
+    }
+    
+    huggingface_state_paths = {
+        org: state_manager.path_for(monitor.state_file)
+        for org, monitor in huggingface_monitors.items()
+    }
+    
     # Setup signal handlers
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     
     # Load existing state for each organization
     github_states = {
-        org: state_manager.load_state(f"github_{org.replace('/', '_')}.json")
+        org: state_manager.load_state(github_monitors[org].state_file)
         for org in GITHUB_ORGS
     }
     
     huggingface_states = {
-        org: state_manager.load_state(f"huggingface_{org.replace('/', '_')}.json")
+        org: state_manager.load_state(huggingface_monitors[org].state_file)
         for org in HUGGINGFACE_ORGS
     }
     
@@ -83,41 +100,31 @@ def main():
     
     logger.info("Starting monitoring loop...")
     
-    while not shutdown_flag:
-        cycle_start = time.time()
+    # One worker per organization so every org is checked concurrently
+    executor = ThreadPoolExecutor(max_workers=max(1, len(GITHUB_ORGS) + len(HUGGINGFACE_ORGS)))
+    
+    while not shutdown_event.is_set():
+        cycle_start = time.monotonic()
         
         try:
-            all_changes = []
-            
-            # Check all GitHub organizations
-            for org in GITHUB_ORGS:
-                github_changes = check_github(
-                    github_monitors[org],
-                    state_manager,
-                    github_states[org],
-                    org,
-                    is_first_run
-                )
-                if github_changes:
-                    all_changes.append(github_changes)
-            
-            # Check all HuggingFace organizations
-            for org in HUGGINGFACE_ORGS:
-                huggingface_changes = check_huggingface(
-                    huggingface_monitors[org],
-                    state_manager,
-                    huggingface_states[org],
-                    org,
-                    is_first_run
-                )
-                if huggingface_changes:
-                    all_changes.append(huggingface_changes)
+            all_changes = run_cycle(
+                executor,
+                github_monitors,
+                huggingface_monitors,
+                github_states,
+                huggingface_states,
+                github_state_paths,
+                huggingface_state_paths,
+                state_manager,
+                is_first_run
+            )
             
             # Send notification if there are changes and not first run
             if not is_first_run and all_changes:
                 merged_changes = merge_all_changes(all_changes)
                 if has_changes(merged_changes):
-                    notifier.send_notification(merged_changes)
+                    # Read-only view: the post runs later on the notifier's thread
+                    notifier.send_notification(MappingProxyType(merged_changes))
             
             # After first run, set flag to false
             if is_first_run:
@@ -125,40 +132,78 @@ def main():
                 logger.info("Initialization complete, will now monitor for changes")
             
         except Exception as e:
-            logger.error(f"Error in monitoring cycle: {e}", exc_info=True)
+            logger.error("Error in monitoring cycle: %s", e, exc_info=True)
         
         # Sleep for remaining time to maintain interval
-        elapsed = time.time() - cycle_start
+        elapsed = time.monotonic() - cycle_start
         sleep_time = max(0, CHECK_INTERVAL - elapsed)
         
-        if sleep_time > 0 and not shutdown_flag:
-            logger.debug(f"Sleeping for {sleep_time:.1f} seconds")
-            time.sleep(sleep_time)
+        if sleep_time > 0 and not shutdown_event.is_set():
+            logger.debug("Sleeping for %.1f seconds", sleep_time)
+            shutdown_event.wait(timeout=sleep_time)
     
+    executor.shutdown(wait=True)
+    notifier.close()
     logger.info("Monitor stopped")
 
 
+def run_cycle(
+    executor: ThreadPoolExecutor,
+    github_monitors: Dict[str, GitHubMonitor],
+    huggingface_monitors: Dict[str, HuggingFaceMonitor],
+    github_states: Dict[str, Dict[str, Any]],
+    huggingface_states: Dict[str, Dict[str, Any]],
+    github_state_paths: Dict[str, Path],
+    huggingface_state_paths: Dict[str, Path],
+    state_manager: StateManager,
+    is_first_run: bool
+) -> List[Dict[str, Any]]:
+    """
+    Check all GitHub and HuggingFace organizations concurrently.
+    
+    Returns:
+        List of non-empty change dicts, in configuration order
+    """
+    futures = [
+        executor.submit(
+            check_github, github_monitors[org], state_manager, github_states[org],
+            github_state_paths[org], org, is_first_run
+        )
+        for org in GITHUB_ORGS
+    ]
+    futures += [
+        executor.submit(
+            check_huggingface, huggingface_monitors[org], state_manager, huggingface_states[org],
+            huggingface_state_paths[org], org, is_first_run
+        )
+        for org in HUGGINGFACE_ORGS
+    ]
+    
+    # check_* never raise, so result() only waits for completion
+    return [changes for changes in (future.result() for future in futures) if changes]
+
+
 def check_github(
     monitor: GitHubMonitor,
     state_manager: StateManager,
     old_state: Dict[str, Any],
+    state_path: Path,
     org_name: str,
     is_first_run: bool
 ) -> Dict[str, Any]:
     """Check GitHub for changes."""
     try:
-        new_state = monitor.fetch_current_state()
+        new_state = monitor.fetch_current_state(old_state)
         
         if new_state is None:
-            logger.warning(f"Failed to fetch GitHub state for {org_name}, skipping this cycle")
+            logger.warning("Failed to fetch GitHub state for %s, skipping this cycle", org_name)
             return {}
         
         # Detect changes
         changes = monitor.detect_changes(old_state, new_state)
         
         # Update state file
-        state_file = f"github_{org_name.replace('/', '_')}.json"
-        state_manager.save_state(state_file, new_state)
+        state_manager.save_state_path(state_path, new_state)
         
         # Update in-memory state for next cycle
         if old_state is not None:
@@ -169,12 +214,12 @@ def check_github(
             github_states[org_name] = new_state
         
         repo_count = len(new_state.get("repos", {}))
-        logger.info(f"GitHub check complete ({org_name}): {repo_count} repos monitored")
+        logger.info("GitHub check complete (%s): %d repos monitored", org_name, repo_count)
         
         return changes
         
     except Exception as e:
-        logger.error(f"Error checking GitHub {org_name}: {e}", exc_info=True)
+        logger.error("Error checking GitHub %s: %s", org_name, e, exc_info=True)
         return {}
 
 
@@ -182,6 +227,7 @@ def check_huggingface(
     monitor: HuggingFaceMonitor,
     state_manager: StateManager,
     old_state: Dict[str, Any],
+    state_path: Path,
     org_name: str,
     is_first_run: bool
 ) -> Dict[str, Any]:
@@ -190,15 +236,14 @@ def check_huggingface(
         new_state = monitor.fetch_current_state()
         
         if new_state is None:
-            logger.warning(f"Failed to fetch HuggingFace state for {org_name}, skipping this cycle")
+            logger.warning("Failed to fetch HuggingFace state for %s, skipping this cycle", org_name)
             return {}
         
         # Detect changes
         changes = monitor.detect_changes(old_state, new_state)
         
         # Update state file
-        state_file = f"huggingface_{org_name.replace('/', '_')}.json"
-        state_manager.save_state(state_file, new_state)
+        state_manager.save_state_path(state_path, new_state)
         
         # Update in-memory state for next cycle
         if old_state is not None:
@@ -210,12 +255,12 @@ def check_huggingface(
         
         model_count = len(new_state.get("models", {}))
         dataset_count = len(new_state.get("datasets", {}))
-        logger.info(f"HuggingFace check complete ({org_name}): {model_count} models, {dataset_count} datasets monitored")
+        logger.info("HuggingFace check complete (%s): %d models, %d datasets monitored", org_name, model_count, dataset_count)
         
         return changes
         
     except Exception as e:
-        logger.error(f"Error checking HuggingFace {org_name}: {e}", exc_info=True)
+        logger.error("Error checking HuggingFace %s: %s", org_name, e, exc_info=True)
         return {}
 
 
@@ -1,19 +1,37 @@
 import logging
 import requests
 import os
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timezone
+from types import MappingProxyType
 
 logger = logging.getLogger(__name__)
 
+# Shared read-only stand-in for a missing last_commit
+_EMPTY = MappingProxyType({})
+
+# Fields kept from each repo listing entry: (name, id, html_url, default_branch, pushed_at)
+_RepoSummary = Tuple[str, int, str, str, str]
+
+
+def _utcnow_iso() -> str:
+    """Return the current UTC time as an ISO 8601 string with a 'Z' suffix."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
 
 class GitHubMonitor:
     """Monitors GitHub organization for repository and commit changes."""
     
-    def __init__(self, org_name: str = "deepseek-ai", github_token: Optional[str] = None):
+    def __init__(self, org_name: str = "deepseek-ai", github_token: Optional[str] = None, max_workers: int = 16):
         self.org_name = org_name
+        self.state_file = f"github_{org_name.replace('/', '_')}.json"
         self.base_url = "https://api.github.com"
         self.headers = {}
+        # Caps concurrent commit requests to stay clear of GitHub's secondary rate limits
+        self.max_workers = max(1, max_workers)
         
         # Use provided GitHub token or check environment variable
         token = github_token or os.environ.get("GITHUB_TOKEN")
@@ -22,57 +40,92 @@ class GitHubMonitor:
             logger.info(f"Using GitHub token for {org_name} (5000 req/hour)")
         else:
             logger.info(f"No GitHub token for {org_name}, using unauthenticated API (60 req/hour)")
+        
+        # Shared session so commit fetches reuse pooled keep-alive connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=max(32, self.max_workers),
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False)
+        )
+        self.session.mount("https://", adapter)
+        
+        # Conditional-request cache for the org repo listing, keyed by page URL
+        # -> (etag, repo summaries, next page URL); a 304 reply costs no rate
+        # limit and lets us reuse the previous page
+        self._pages: Dict[str, Tuple[Optional[str], List[_RepoSummary], Optional[str]]] = {}
+        self._last_state: Optional[Dict[str, Any]] = None
     
-    def fetch_current_state(self) -> Optional[Dict[str, Any]]:
+    def fetch_current_state(self, previous_state: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Fetch current state of all repositories in the organization.
         
+        Args:
+            previous_state: Last known state (e.g. loaded from disk); repos whose
+                pushed_at is unchanged reuse its last_commit instead of refetching.
+                Defaults to the state returned by the previous call.
+        
         Returns:
             Dictionary with repo data, or None if failed
         """
         try:
             # Fetch all repos in organization
-            repos_url = f"{self.base_url}/orgs/{self.org_name}/repos"
-            params = {"per_page": 100, "type": "all"}
+            result = self._fetch_repos()
+            if result is None:
+                return None
             
-            response = requests.get(repos_url, params=params, headers=self.headers, timeout=30)
+            repos, modified = result
+            if modified:
+                logger.info("Fetched %d repositories from GitHub (%s)", len(repos), self.org_name)
+            else:
+                logger.info("Repository list unchanged for GitHub (%s), %d repositories", self.org_name, len(repos))
             
-            if response.status_code == 403:
-                logger.warning("GitHub rate limit reached, skipping this cycle")
-                return None
+            # pushed_at only moves on a push, so repos whose pushed_at matches the
+            # previous cycle can keep their last known commit
+            previous = previous_state or self._last_state
+            previous_repos = previous.get("repos", {}) if previous else {}
             
-            if response.status_code != 200:
-                logger.error(f"GitHub API error {response.status_code}: {response.text}")
-                return None
+            commits = {}
+            stale = []
+            for name, _, _, branch, pushed_at in repos:
+                previous_repo = previous_repos.get(name)
+                if self._needs_commit_fetch(branch, pushed_at, previous_repo):
+                    stale.append((name, branch))
+                else:
+                    commits[name] = previous_repo["last_commit"]
             
-            repos = response.json()
-            logger.info(f"Fetched {len(repos)} repositories from GitHub ({self.org_name})")
+            # Fetch latest commit SHA and details for changed repos concurrently
+            if stale:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale))) as executor:
+                    futures = {
+                        executor.submit(self._fetch_latest_commit, name, branch): name
+                        for name, branch in stale
+                    }
+                    for future in as_completed(futures):
+                        commits[futures[future]] = future.result()
             
-            # Build state with latest commit for each repo
+            # Build state with latest commit for each repo; repo info is always
+            # saved, even if its commit fetch failed
             state = {
-                "last_check": datetime.utcnow().isoformat() + "Z",
-                "repos": {}
-            }
-            
-            for repo in repos:
-                repo_name = repo["name"]
-                default_branch = repo.get("default_branch", "main")
-                
-                # Fetch latest commit SHA and details
-                commit_info = self._fetch_latest_commit(repo_name, default_branch)
-                
-                # Always save repo info, even if commit fetch fails
-                state["repos"][repo_name] = {
-                    "id": repo["id"],
-                    "url": repo["html_url"],
-                    "default_branch": default_branch,
-                    "last_commit": commit_info  # Dict with sha, message, author, date
+                "last_check": _utcnow_iso(),
+                "repos": {
+                    name: {
+                        "id": repo_id,
+                        "url": url,
+                        "default_branch": branch,
+                        "pushed_at": pushed_at,
+                        "last_commit": commits[name]  # Dict with sha, message, author, date
+                    }
+                    for name, repo_id, url, branch, pushed_at in repos
                 }
+            }
             
+            self._last_state = state
             return state
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error fetching GitHub data: {e}")
+            logger.error("Network error fetching GitHub data: %s", e)
             return None
     
     def detect_changes(self, old_state: Dict[str, Any], new_state: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
@@ -94,42 +147,108 @@ class GitHubMonitor:
             "updated_repos": []
         }
         
-        # Detect new repositories
+        # Previous SHA per repo, extracted once up front
+        old_shas = {
+            name: (info.get("last_commit") or _EMPTY).get("sha") or ""
+            for name, info in old_repos.items()
+        }
+        
+        # Detect new and updated repositories (new commits based on SHA) in one pass
         for repo_name, repo_data in new_repos_dict.items():
-            if repo_name not in old_repos:
+            old_sha = old_shas.get(repo_name)
+            
+            if old_sha is None:
                 changes["new_repos"].append({
                     "name": repo_name,
                     "url": repo_data["url"],
                     "org": self.org_name
                 })
-                logger.info(f"New repository detected: {repo_name} ({self.org_name})")
-        
-        # Detect updated repositories (new commits based on SHA)
-        for repo_name, repo_data in new_repos_dict.items():
-            if repo_name in old_repos:
-                old_commit = old_repos[repo_name].get("last_commit", {})
-                new_commit = repo_data.get("last_commit", {})
-                
-                old_sha = old_commit.get("sha") if old_commit else None
-                new_sha = new_commit.get("sha") if new_commit else None
-                
-                # Compare SHAs to detect real commits (not just pushed_at changes)
-                if old_sha and new_sha and old_sha != new_sha:
-                    changes["updated_repos"].append({
-                        "name": repo_name,
-                        "url": repo_data["url"],
-                        "org": self.org_name,
-                        "commit": {
-                            "sha": new_sha[:7],  # Short SHA
-                            "message": new_commit.get("message", "No message"),
-                            "author": new_commit.get("author", "Unknown"),
-                            "date": new_commit.get("date", "")
-                        }
-                    })
-                    logger.info(f"New commit detected in {repo_name} ({self.org_name}): {new_sha[:7]} by {new_commit.get('author', 'Unknown')}")
+                logger.info("New repository detected: %s (%s)", repo_name, self.org_name)
+                continue
+            
+            new_commit = repo_data.get("last_commit") or _EMPTY
+            new_sha = new_commit.get("sha")
+            
+            # Compare SHAs to detect real commits (not just pushed_at changes)
+            if old_sha and new_sha and old_sha != new_sha:
+                changes["updated_repos"].append({
+                    "name": repo_name,
+                    "url": repo_data["url"],
+                    "org": self.org_name,
+                    "commit": {
+                        "sha": new_sha[:7],  # Short SHA
+                        "message": new_commit.get("message", "No message"),
+                        "author": new_commit.get("author", "Unknown"),
+                        "date": new_commit.get("date", "")
+                    }
+                })
+                logger.info("New commit detected in %s (%s): %s by %s", repo_name, self.org_name, new_sha[:7], new_commit.get('author', 'Unknown'))
         
         return changes
     
+    def _fetch_repos(self) -> Optional[Tuple[List[_RepoSummary], bool]]:
+        """
+        Fetch every page of the organization's repo listing.
+        
+        Follows the Link rel="next" header and revalidates each page with its
+        cached ETag, so unchanged pages come back as an empty 304.
+        
+        Returns:
+            Tuple of (repo summaries, whether any page changed), or None if failed
+        """
+        url = f"{self.base_url}/orgs/{self.org_name}/repos?per_page=100&type=all"
+        repos = []
+        pages = {}
+        modified = False
+        
+        while url:
+            cached = self._pages.get(url)
+            headers = {"If-None-Match": cached[0]} if cached and cached[0] else {}
+            
+            response = self.session.get(url, headers=headers, timeout=30)
+            
+            if response.status_code == 403:
+                logger.warning("GitHub rate limit reached, skipping this cycle")
+                return None
+            
+            if response.status_code == 304 and cached:
+                page = cached
+            elif response.status_code != 200:
+                logger.error("GitHub API error %d: %s", response.status_code, response.text)
+                return None
+            else:
+                # Keep only the fields we use so the full listing JSON (hundreds of
+                # fields per repo) can be freed right away
+                listing = response.json()
+                summaries = [
+                    (r["name"], r["id"], r["html_url"], r.get("default_branch") or "main", r.get("pushed_at") or "")
+                    for r in listing
+                ]
+                del listing
+                page = (response.headers.get("ETag"), summaries, response.links.get("next", {}).get("url"))
+                response.close()
+                modified = True
+            
+            pages[url] = page
+            repos.extend(page[1])
+            url = page[2]
+        
+        # Replace rather than merge so pages that disappeared are dropped
+        self._pages = pages
+        return repos, modified
+    
+    @staticmethod
+    def _needs_commit_fetch(branch: str, pushed_at: str, previous: Optional[Dict[str, Any]]) -> bool:
+        """Check whether a repo's latest commit must be re-fetched from the API."""
+        if not previous or not previous.get("last_commit"):
+            return True
+        
+        return (
+            not pushed_at
+            or previous.get("pushed_at") != pushed_at
+            or previous.get("default_branch") != branch
+        )
+    
     def _fetch_latest_commit(self, repo_name: str, branch: str) -> Optional[Dict[str, str]]:
         """
         Fetch the latest commit info for a specific repository and branch.
@@ -143,21 +262,21 @@ class GitHubMonitor:
         """
         try:
             commits_url = f"{self.base_url}/repos/{self.org_name}/{repo_name}/commits/{branch}"
-            response = requests.get(commits_url, headers=self.headers, timeout=30)
+            response = self.session.get(commits_url, timeout=30)
             
             if response.status_code == 403:
-                logger.debug(f"Rate limit hit when fetching commit for {repo_name}")
+                logger.debug("Rate limit hit when fetching commit for %s", repo_name)
                 return None
             
             if response.status_code == 404:
-                logger.debug(f"Branch {branch} not found in {repo_name}, trying 'master'")
+                logger.debug("Branch %s not found in %s, trying 'master'", branch, repo_name)
                 # Try 'master' if 'main' doesn't exist
                 if branch == "main":
                     return self._fetch_latest_commit(repo_name, "master")
                 return None
             
             if response.status_code != 200:
-                logger.warning(f"Failed to fetch commit for {repo_name}: {response.status_code}")
+                logger.warning("Failed to fetch commit for %s: %d", repo_name, response.status_code)
                 return None
             
             commit_data = response.json()
@@ -178,5 +297,5 @@ class GitHubMonitor:
             }
             
         except requests.exceptions.RequestException as e:
-            logger.debug(f"Network error fetching commit for {repo_name}: {e}")
+            logger.debug("Network error fetching commit for %s: %s", repo_name, e)
             return None
@@ -1,17 +1,38 @@
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Fields requested from the model/dataset listings ("id" is always included);
+# everything else in the default payload is dropped by fetch_current_state
+_LISTING_FIELDS = ("lastModified",)
+
+
+def _utcnow_iso() -> str:
+    """Return the current UTC time as an ISO 8601 string with a 'Z' suffix."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
 
 class HuggingFaceMonitor:
     """Monitors HuggingFace organization for model and dataset changes."""
     
     def __init__(self, org_name: str = "deepseek-ai"):
         self.org_name = org_name
+        self.state_file = f"huggingface_{org_name.replace('/', '_')}.json"
         self.base_url = "https://huggingface.co/api"
+        
+        # Shared session so model/dataset listings reuse one keep-alive connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False)
+        )
+        self.session.mount("https://", adapter)
     
     def fetch_current_state(self) -> Optional[Dict[str, Any]]:
         """
@@ -22,7 +43,7 @@ class HuggingFaceMonitor:
         """
         try:
             state = {
-                "last_check": datetime.utcnow().isoformat() + "Z",
+                "last_check": _utcnow_iso(),
                 "models": {},
                 "datasets": {}
             }
@@ -30,69 +51,71 @@ class HuggingFaceMonitor:
             # Fetch models
             models = self._fetch_models()
             if models is not None:
-                for model in models:
-                    model_id = model.get("id") or model.get("modelId")
-                    if model_id:
-                        state["models"][model_id] = {
-                            "id": model_id,
-                            "url": f"https://huggingface.co/{model_id}",
-                            "last_modified": model.get("lastModified", "")
-                        }
-                logger.info(f"Fetched {len(state['models'])} models from HuggingFace ({self.org_name})")
+                state["models"] = {
+                    model_id: {
+                        "id": model_id,
+                        "url": f"https://huggingface.co/{model_id}",
+                        "last_modified": model.get("lastModified", "")
+                    }
+                    for model in models
+                    if (model_id := model.get("id") or model.get("modelId"))
+                }
+                logger.info("Fetched %d models from HuggingFace (%s)", len(state['models']), self.org_name)
             
             # Fetch datasets
             datasets = self._fetch_datasets()
             if datasets is not None:
-                for dataset in datasets:
-                    dataset_id = dataset.get("id")
-                    if dataset_id:
-                        state["datasets"][dataset_id] = {
-                            "id": dataset_id,
-                            "url": f"https://huggingface.co/datasets/{dataset_id}",
-                            "last_modified": dataset.get("lastModified", "")
-                        }
-                logger.info(f"Fetched {len(state['datasets'])} datasets from HuggingFace ({self.org_name})")
+                state["datasets"] = {
+                    dataset_id: {
+                        "id": dataset_id,
+                        "url": f"https://huggingface.co/datasets/{dataset_id}",
+                        "last_modified": dataset.get("lastModified", "")
+                    }
+                    for dataset in datasets
+                    if (dataset_id := dataset.get("id"))
+                }
+                logger.info("Fetched %d datasets from HuggingFace (%s)", len(state['datasets']), self.org_name)
             
             return state
             
         except Exception as e:
-            logger.error(f"Error fetching HuggingFace data: {e}")
+            logger.error("Error fetching HuggingFace data: %s", e)
             return None
     
     def _fetch_models(self) -> Optional[List[Dict[str, Any]]]:
         """Fetch all models for the organization."""
         try:
             url = f"{self.base_url}/models"
-            params = {"author": self.org_name, "limit": 500}
+            params = {"author": self.org_name, "limit": 500, "expand": _LISTING_FIELDS}
             
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 return response.json()
             else:
-                logger.error(f"HuggingFace models API error {response.status_code}")
+                logger.error("HuggingFace models API error %d", response.status_code)
                 return None
                 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error fetching HuggingFace models: {e}")
+            logger.error("Network error fetching HuggingFace models: %s", e)
             return None
     
     def _fetch_datasets(self) -> Optional[List[Dict[str, Any]]]:
         """Fetch all datasets for the organization."""
         try:
             url = f"{self.base_url}/datasets"
-            params = {"author": self.org_name, "limit": 500}
+            params = {"author": self.org_name, "limit": 500, "expand": _LISTING_FIELDS}
             
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
                 return response.json()
             else:
-                logger.error(f"HuggingFace datasets API error {response.status_code}")
+                logger.error("HuggingFace datasets API error %d", response.status_code)
                 return None
                 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error fetching HuggingFace datasets: {e}")
+            logger.error("Network error fetching HuggingFace datasets: %s", e)
             return None
     
     def detect_changes(self, old_state: Dict[str, Any], new_state: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
@@ -123,48 +146,56 @@ class HuggingFaceMonitor:
             "updated_datasets": []
         }
         
-        # Detect new models
+        # Previous last_modified per model/dataset, extracted once up front
+        old_model_modified = {
+            model_id: info.get("last_modified") or ""
+            for model_id, info in old_models.items()
+        }
+        old_dataset_modified = {
+            dataset_id: info.get("last_modified") or ""
+            for dataset_id, info in old_datasets.items()
+        }
+        
+        # Detect new and updated models in one pass
         for model_id, model_data in new_models.items():
-            if model_id not in old_models:
+            old_modified = old_model_modified.get(model_id)
+            
+            if old_modified is None:
                 changes["new_models"].append({
                     "name": model_id,
                     "url": model_data["url"]
                 })
-                logger.info(f"New model detected: {model_id} ({self.org_name})")
-        
-        # Detect updated models
-        for model_id, model_data in new_models.items():
-            if model_id in old_models:
-                old_modified = old_models[model_id].get("last_modified", "")
-                new_modified = model_data.get("last_modified", "")
-                
-                if old_modified and new_modified and old_modified != new_modified:
-                    changes["updated_models"].append({
-                        "name": model_id,
-                        "url": model_data["url"]
-                    })
-                    logger.info(f"Model updated: {model_id} ({self.org_name})")
+                logger.info("New model detected: %s (%s)", model_id, self.org_name)
+                continue
+            
+            new_modified = model_data.get("last_modified", "")
+            
+            if old_modified and new_modified and old_modified != new_modified:
+                changes["updated_models"].append({
+                    "name": model_id,
+                    "url": model_data["url"]
+                })
+                logger.info("Model updated: %s (%s)", model_id, self.org_name)
         
-        # Detect new datasets
+        # Detect new and updated datasets in one pass
         for dataset_id, dataset_data in new_datasets.items():
-            if dataset_id not in old_datasets:
+            old_modified = old_dataset_modified.get(dataset_id)
+            
+            if old_modified is None:
                 changes["new_datasets"].append({
                     "name": dataset_id,
                     "url": dataset_data["url"]
                 })
-                logger.info(f"New dataset detected: {dataset_id} ({self.org_name})")
-        
-        # Detect updated datasets
-        for dataset_id, dataset_data in new_datasets.items():
-            if dataset_id in old_datasets:
-                old_modified = old_datasets[dataset_id].get("last_modified", "")
-                new_modified = dataset_data.get("last_modified", "")
-                
-                if old_modified and new_modified and old_modified != new_modified:
-                    changes["updated_datasets"].append({
-                        "name": dataset_id,
-                        "url": dataset_data["url"]
-                    })
-                    logger.info(f"Dataset updated: {dataset_id} ({self.org_name})")
+                logger.info("New dataset detected: %s (%s)", dataset_id, self.org_name)
+                continue
+            
+            new_modified = dataset_data.get("last_modified", "")
+            
+            if old_modified and new_modified and old_modified != new_modified:
+                changes["updated_datasets"].append({
+                    "name": dataset_id,
+                    "url": dataset_data["url"]
+                })
+                logger.info("Dataset updated: %s (%s)", dataset_id, self.org_name)
         
         return changes
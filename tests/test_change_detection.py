@@ -3,8 +3,8 @@
 Test script to demonstrate commit change detection.
 """
 import logging
-import json
 from monitors.github_monitor import GitHubMonitor
+from utils.json_codec import loads
 from utils.wechat_notifier import WeChatNotifier
 
 # Configure logging
@@ -22,13 +22,14 @@ def test_change_detection():
     logger.info("=" * 60)
     
     # Load the current state
-    with open('state/github_deepseek-ai.json', 'r') as f:
-        current_state = json.load(f)
+    with open('state/github_deepseek-ai.json', 'rb') as f:
+        current_state = loads(f.read())
     
     logger.info(f"\nLoaded state with {len(current_state['repos'])} repos")
     
-    # Simulate an old state (change one commit)
-    old_state = json.loads(json.dumps(current_state))  # Deep copy
+    # Simulate an old state (change one commit); only the repo being modified
+    # is copied below, every other entry is shared with current_state
+    old_state = {**current_state, "repos": dict(current_state["repos"])}
     
     # Pick a repo to simulate a commit change
     test_repo = "DeepSeek-Coder"
@@ -40,9 +41,15 @@ def test_change_detection():
         logger.info(f"   Author: {old_commit['author']}")
         
         # Simulate a new commit
-        old_state['repos'][test_repo]['last_commit']['sha'] = 'abc1234567890' + old_commit['sha'][13:]
-        old_state['repos'][test_repo]['last_commit']['message'] = 'feat: add new feature X'
-        old_state['repos'][test_repo]['last_commit']['author'] = 'Test Developer'
+        old_state['repos'][test_repo] = {
+            **old_state['repos'][test_repo],
+            "last_commit": {
+                **old_commit,
+                "sha": 'abc1234567890' + old_commit['sha'][13:],
+                "message": 'feat: add new feature X',
+                "author": 'Test Developer'
+            }
+        }
         
         logger.info(f"\n2. Simulated OLD state (before update):")
         logger.info(f"   SHA: {old_state['repos'][test_repo]['last_commit']['sha'][:7]}")
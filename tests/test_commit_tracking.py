@@ -4,9 +4,6 @@ Test script for commit SHA-based tracking implementation.
 """
 import logging
 import json
-from monitors.github_monitor import GitHubMonitor
-from utils.state_manager import StateManager
-from config import GITHUB_TOKEN
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +15,12 @@ logger = logging.getLogger(__name__)
 
 def test_commit_tracking():
     """Test the new commit SHA-based tracking."""
+    # Imported here so loading this script stays cheap; these pull in
+    # requests and read config.yaml
+    from monitors.github_monitor import GitHubMonitor
+    from utils.state_manager import StateManager
+    from config import GITHUB_TOKEN
+    
     logger.info("=" * 60)
     logger.info("Testing Commit SHA-based Tracking")
     logger.info("=" * 60)
@@ -27,7 +30,7 @@ def test_commit_tracking():
     state_manager = StateManager("state")
     monitor = GitHubMonitor(org_name, GITHUB_TOKEN)
     
-    logger.info(f"\n1. Fetching current state for {org_name}...")
+    logger.info("\n1. Fetching current state for %s...", org_name)
     new_state = monitor.fetch_current_state()
     
     if new_state is None:
@@ -35,65 +38,63 @@ def test_commit_tracking():
         return False
     
     repos = new_state.get("repos", {})
-    logger.info(f"   ✓ Fetched {len(repos)} repositories")
+    logger.info("   ✓ Fetched %s repositories", len(repos))
     
     # Display sample repo with commit info
     if repos:
-        sample_repo = list(repos.keys())[0]
+        sample_repo = next(iter(repos))
         sample_data = repos[sample_repo]
-        logger.info(f"\n2. Sample repository: {sample_repo}")
-        logger.info(f"   URL: {sample_data.get('url')}")
+        logger.info("\n2. Sample repository: %s", sample_repo)
+        logger.info("   URL: %s", sample_data.get('url'))
         
         commit = sample_data.get('last_commit')
         if commit:
-            logger.info(f"   Commit SHA: {commit.get('sha', 'N/A')[:7]}")
-            logger.info(f"   Message: {commit.get('message', 'N/A')}")
-            logger.info(f"   Author: {commit.get('author', 'N/A')}")
-            logger.info(f"   Date: {commit.get('date', 'N/A')}")
+            logger.info("   Commit SHA: %s", commit.get('sha', 'N/A')[:7])
+            logger.info("   Message: %s", commit.get('message', 'N/A'))
+            logger.info("   Author: %s", commit.get('author', 'N/A'))
+            logger.info("   Date: %s", commit.get('date', 'N/A'))
         else:
-            logger.warning(f"   No commit info available (might be rate limited)")
+            logger.warning("   No commit info available (might be rate limited)")
     
     # Save state
-    logger.info(f"\n3. Saving state...")
+    logger.info("\n3. Saving state...")
     state_file = f"github_{org_name}.json"
     state_manager.save_state(state_file, new_state)
-    logger.info(f"   ✓ Saved to state/{state_file}")
+    logger.info("   ✓ Saved to state/%s", state_file)
     
     # Verify state format
-    logger.info(f"\n4. Verifying state format...")
-    loaded_state = state_manager.load_state(state_file)
+    logger.info("\n4. Verifying state format...")
+    repos_with_commits = 0
+    repos_without_commits = 0
     
-    if loaded_state:
-        repos_with_commits = 0
-        repos_without_commits = 0
-        
-        for repo_name, repo_data in loaded_state.get("repos", {}).items():
-            if repo_data.get("last_commit"):
-                repos_with_commits += 1
-            else:
-                repos_without_commits += 1
-        
-        logger.info(f"   ✓ Repos with commit info: {repos_with_commits}")
-        logger.info(f"   ✓ Repos without commit info: {repos_without_commits}")
-        
-        if repos_without_commits > 0:
-            logger.warning(f"   ⚠ Some repos don't have commit info (likely due to rate limits)")
+    # Stream repos back from the saved file instead of parsing it whole again
+    for repo_name, repo_data in state_manager.iter_repos(state_file):
+        if repo_data.get("last_commit"):
+            repos_with_commits += 1
+        else:
+            repos_without_commits += 1
+    
+    logger.info("   ✓ Repos with commit info: %s", repos_with_commits)
+    logger.info("   ✓ Repos without commit info: %s", repos_without_commits)
+    
+    if repos_without_commits > 0:
+        logger.warning("   ⚠ Some repos don't have commit info (likely due to rate limits)")
     
     # Test change detection (simulate an update)
-    logger.info(f"\n5. Testing change detection...")
-    logger.info(f"   Simulating no changes (comparing state with itself)...")
+    logger.info("\n5. Testing change detection...")
+    logger.info("   Simulating no changes (comparing state with itself)...")
     changes = monitor.detect_changes(new_state, new_state)
     
     new_repos = len(changes.get("new_repos", []))
     updated_repos = len(changes.get("updated_repos", []))
     
-    logger.info(f"   ✓ New repos: {new_repos}")
-    logger.info(f"   ✓ Updated repos: {updated_repos}")
+    logger.info("   ✓ New repos: %s", new_repos)
+    logger.info("   ✓ Updated repos: %s", updated_repos)
     
     if new_repos == 0 and updated_repos == 0:
-        logger.info(f"   ✓ Change detection works correctly (no false positives)")
+        logger.info("   ✓ Change detection works correctly (no false positives)")
     else:
-        logger.error(f"   ✗ Unexpected changes detected!")
+        logger.error("   ✗ Unexpected changes detected!")
     
     logger.info("\n" + "=" * 60)
     logger.info("Test completed!")
@@ -106,5 +107,5 @@ if __name__ == "__main__":
         success = test_commit_tracking()
         exit(0 if success else 1)
     except Exception as e:
-        logger.error(f"Test failed with error: {e}", exc_info=True)
+        logger.error("Test failed with error: %s", e, exc_info=True)
         exit(1)
@@ -4,10 +4,13 @@ Test script for WeChat webhook notification.
 Run this to verify webhook is working before starting the monitor.
 """
 import sys
-from utils.wechat_notifier import WeChatNotifier
-from config import WECHAT_WEBHOOK_URL
 
 def main():
+    # Imported here so loading this script stays cheap; these pull in
+    # requests and read config.yaml
+    from utils.wechat_notifier import WeChatNotifier
+    from config import WECHAT_WEBHOOK_URL
+    
     print(f"Testing WeChat webhook: {WECHAT_WEBHOOK_URL}")
     
     notifier = WeChatNotifier(WECHAT_WEBHOOK_URL)
@@ -38,7 +41,8 @@ def main():
         "huggingface_updated_datasets": []
     }
     
-    success = notifier.send_notification(test_changes)
+    success = notifier.send_notification_sync(test_changes)
+    notifier.close()
     
     if success:
         print("✓ Test notification sent successfully!")
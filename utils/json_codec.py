@@ -0,0 +1,43 @@
+import json
+from typing import Any, Union
+
+# orjson is optional; it is several times faster than the stdlib encoder/decoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize obj to key-sorted UTF-8 JSON bytes.
+    
+    Args:
+        obj: Object to serialize
+        pretty: Indent with 2 spaces instead of emitting compact JSON
+    
+    Returns:
+        Encoded JSON; key order is stable so identical objects encode identically
+    """
+    if orjson is not None:
+        # OPT_NON_STR_KEYS matches the stdlib's coercion of int/float dict keys
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=True).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize JSON from bytes or str.
+    
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,23 +1,60 @@
+import copy
+import gzip
+import hashlib
 import json
 import logging
 import os
+import zlib
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Tuple
+
+from utils.json_codec import dumps, loads
+
+# ijson is optional; without it iter_repos falls back to a full load
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+# Keys that change on every cycle without any change to the monitored data;
+# they are left out of the unchanged-state check in save_state_path
+_VOLATILE_KEYS = ("last_check",)
+
 
 class StateManager:
     """Manages JSON state files for tracking repository changes."""
     
-    def __init__(self, state_dir: str = "state"):
+    def __init__(self, state_dir: str = "state", fsync_dir: bool = False, compress: bool = False):
         self.state_dir = Path(state_dir)
+        # Store state files gzipped as <name>.json.gz (see path_for)
+        self.compress = compress
+        # Also fsync the directory after each rename so the new entry survives
+        # power loss; costs an extra sync on I/O-heavy hosts
+        self.fsync_dir = fsync_dir
+        # Last loaded/saved state per file -> ((mtime_ns, size), state), so
+        # re-reading a file this manager just wrote skips the read and parse
+        self._cache: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        # Digest of the last saved content per file, used to skip no-op writes
+        self._last_hash: Dict[Path, bytes] = {}
         self._ensure_state_dir()
     
     def _ensure_state_dir(self) -> None:
         """Create state directory if it doesn't exist."""
         self.state_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"State directory ready: {self.state_dir}")
+        logger.info("State directory ready: %s", self.state_dir)
+    
+    def path_for(self, filename: str) -> Path:
+        """
+        Resolve a state filename to its path on disk.
+        
+        With compression enabled, '.gz' is appended to filenames that don't
+        already end with it. Any path ending in '.gz' is read and written gzipped.
+        """
+        if self.compress and not filename.endswith(".gz"):
+            filename += ".gz"
+        return self.state_dir / filename
     
     def load_state(self, filename: str) -> Dict[str, Any]:
         """
@@ -27,44 +64,170 @@ class StateManager:
             filename: Name of the state file (e.g., 'github_state.json')
         
         Returns:
-            Dictionary containing state, or empty dict if file doesn't exist
+            Dictionary containing state, or empty dict if file doesn't exist.
+            The caller owns the returned dict and may mutate it freely.
         """
-        filepath = self.state_dir / filename
+        filepath = self.path_for(filename)
         
-        if not filepath.exists():
-            logger.info(f"State file not found: {filename}, starting fresh")
+        try:
+            stat = filepath.stat()
+        except FileNotFoundError:
+            logger.info("State file not found: %s, starting fresh", filename)
+            return {}
+        except OSError as e:
+            logger.error("Error loading %s: %s, treating as fresh start", filename, e)
             return {}
         
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(filepath)
+        if cached and cached[0] == version:
+            logger.info("Loaded state from %s (cached)", filename)
+            return copy.deepcopy(cached[1])
+        
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                state = json.load(f)
-            logger.info(f"Loaded state from {filename}")
-            return state
+            raw = filepath.read_bytes()
+            if filepath.suffix == ".gz":
+                raw = gzip.decompress(raw)
+            state = loads(raw)
+            self._cache[filepath] = (version, state)
+            logger.info("Loaded state from %s", filename)
+            return copy.deepcopy(state)
         except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in {filename}: {e}, treating as fresh start")
+            logger.error("Invalid JSON in %s: %s, treating as fresh start", filename, e)
             return {}
         except Exception as e:
-            logger.error(f"Error loading {filename}: {e}, treating as fresh start")
+            logger.error("Error loading %s: %s, treating as fresh start", filename, e)
             return {}
     
-    def save_state(self, filename: str, state: Dict[str, Any]) -> bool:
+    def iter_repos(self, filename: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Iterate over the "repos" mapping of a state file without loading it whole.
+        
+        Args:
+            filename: Name of the state file (e.g., 'github_deepseek-ai.json')
+        
+        Entries are parsed incrementally, so a file that turns out to be
+        invalid partway through still yields the entries before the error;
+        iteration then stops and the error is logged. Use load_state when an
+        all-or-nothing read is required.
+        
+        Yields:
+            (repo_name, repo_data) tuples; nothing if the file is missing
+        """
+        filepath = self.path_for(filename)
+        
+        try:
+            stat = filepath.stat()
+        except OSError:
+            return
+        
+        # A state this manager just saved or loaded is already in memory
+        cached = self._cache.get(filepath)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            for name, data in cached[1].get("repos", {}).items():
+                yield name, copy.deepcopy(data)
+            return
+        
+        if ijson is None:
+            yield from self.load_state(filename).get("repos", {}).items()
+            return
+        
+        try:
+            opener = gzip.open if filepath.suffix == ".gz" else open
+            with opener(filepath, 'rb') as f:
+                yield from ijson.kvitems(f, 'repos', use_float=True)
+        except ijson.JSONError as e:
+            logger.error("Invalid JSON in %s: %s, stopping iteration", filename, e)
+        except (OSError, EOFError, zlib.error) as e:
+            # Unreadable file, or a corrupt/truncated gzip stream
+            logger.error("Error reading %s: %s, stopping iteration", filename, e)
+    
+    def save_state(self, filename: str, state: Dict[str, Any], pretty: bool = False) -> bool:
         """
         Save state to JSON file.
         
         Args:
             filename: Name of the state file
             state: Dictionary to save
+            pretty: Write indented JSON instead of compact JSON
         
         Returns:
             True if saved successfully, False otherwise
         """
-        filepath = self.state_dir / filename
+        return self.save_state_path(self.path_for(filename), state, pretty)
+    
+    def save_state_path(self, filepath: Path, state: Dict[str, Any], pretty: bool = False) -> bool:
+        """
+        Save state to a pre-resolved JSON file path.
+        
+        The state is written to a temporary file in the same directory and
+        renamed over the target, so a crash mid-write never leaves a truncated
+        state file behind. If the content (ignoring last_check) is identical to
+        the previous save, the write is skipped entirely.
+        
+        Args:
+            filepath: Full path of the state file (e.g. from path_for, resolved
+                once at startup); a '.gz' suffix writes it gzipped
+            state: Dictionary to save
+            pretty: Write indented JSON instead of compact JSON
+        
+        Returns:
+            True if saved successfully, False otherwise
+        """
+        tmp_path = filepath.with_name(filepath.name + ".tmp")
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(state, f, indent=2, ensure_ascii=False)
-            logger.info(f"Saved state to {filename}")
-            return True
+            content = {k: v for k, v in state.items() if k not in _VOLATILE_KEYS}
+            content_bytes = dumps(content)
+            digest = hashlib.blake2b(content_bytes, digest_size=16).digest()
+            
+            if self._last_hash.get(filepath) == digest and filepath.exists():
+                logger.debug("State unchanged, skipping write to %s", filepath.name)
+                return True
+            
+            if len(content) == len(state) and not pretty:
+                data = content_bytes
+            else:
+                data = dumps(state, pretty)
+            
+            if filepath.suffix == ".gz":
+                # Level 3 is near the throughput sweet spot; mtime=0 keeps output reproducible
+                data = gzip.compress(data, compresslevel=3, mtime=0)
+            data = memoryview(data)
+            
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                # Normally a single write; loop in case the kernel accepts a partial one
+                while data:
+                    data = data[os.write(fd, data):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            
+            os.replace(tmp_path, filepath)
+            stat = filepath.stat()
+            self._cache[filepath] = ((stat.st_mtime_ns, stat.st_size), copy.deepcopy(state))
+            self._last_hash[filepath] = digest
         except Exception as e:
-            logger.error(f"Error saving {filename}: {e}")
+            logger.error("Error saving %s: %s", filepath.name, e)
+            # Leave the previous state file untouched and drop the partial copy
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
             return False
+        
+        if self.fsync_dir:
+            # The new file is already in place; a failure here only means the
+            # rename may not survive a power loss, so it does not fail the save
+            try:
+                dir_fd = os.open(filepath.parent, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            except OSError as e:
+                logger.warning("Could not fsync state directory for %s: %s", filepath.name, e)
+        
+        logger.info("Saved state to %s", filepath.name)
+        return True
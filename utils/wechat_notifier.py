@@ -1,122 +1,290 @@
 import logging
+import random
+import time
 import requests
-from typing import List, Dict, Any
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Any, Mapping, Optional
+
+from utils.json_codec import dumps
 
 logger = logging.getLogger(__name__)
 
+# WeChat Work reports its own rate limiting in the JSON body (HTTP 200)
+_ERRCODE_RATE_LIMITED = 45009
+_RATE_LIMIT_ATTEMPTS = 3
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# WeChat Work rejects markdown content over 4096 bytes; keep some headroom
+_MAX_MESSAGE_BYTES = 4000
+
+
+def _utf8_len(text: str) -> int:
+    """UTF-8 byte length of text, skipping the encode for pure-ASCII strings."""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+@lru_cache(maxsize=64)
+def _org_prefix(org: str) -> str:
+    """Build the '[org] ' label; cached since a batch usually shares one org."""
+    return f"[{org}] " if org else ""
+
+
+def _fmt_repo_line(repo: Dict[str, Any]) -> str:
+    """Format a new GitHub repo as '- [org] [name](url)'."""
+    return f"- {_org_prefix(repo.get('org') or '')}[{repo['name']}]({repo['url']})"
+
+
+def _fmt_commit_lines(repo: Dict[str, Any]) -> str:
+    """Format an updated GitHub repo as its repo line plus a commit detail line."""
+    commit = repo.get('commit', {})
+    
+    # Format: [org] repo_name: commit_sha - message (author)
+    commit_sha = commit.get('sha', 'unknown')
+    commit_msg = commit.get('message', 'No message')
+    commit_author = commit.get('author', 'Unknown')
+    
+    return f"{_fmt_repo_line(repo)}\n  `{commit_sha}` {commit_msg} *by {commit_author}*"
+
+
+def _fmt_simple_line(item: Dict[str, Any]) -> str:
+    """Format a HuggingFace model or dataset as '- [name](url)'."""
+    return f"- [{item['name']}]({item['url']})"
+
+
+# (changes key, section header, per-item formatter), in display order
+SECTIONS = (
+    ("github_new_repos", "## 🆕 New GitHub Repositories", _fmt_repo_line),
+    ("github_updated_repos", "## 📝 GitHub Repository Updates", _fmt_commit_lines),
+    ("huggingface_new_models", "## 🤗 New HuggingFace Models", _fmt_simple_line),
+    ("huggingface_updated_models", "## 🔄 HuggingFace Model Updates", _fmt_simple_line),
+    ("huggingface_new_datasets", "## 🗂️ New HuggingFace Datasets", _fmt_simple_line),
+    ("huggingface_updated_datasets", "## 🔄 HuggingFace Dataset Updates", _fmt_simple_line),
+)
+
+_KEYS = tuple(key for key, _, _ in SECTIONS)
+
 
 class WeChatNotifier:
     """Sends notifications to WeChat Work webhook."""
     
     def __init__(self, webhook_url: str):
         self.webhook_url = webhook_url
+        
+        # Shared session so successive notifications reuse one TLS connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            # POST is not retried by default; webhook posts are safe to resend on
+            # these transient statuses
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["POST"]),
+                raise_on_status=False
+            )
+        )
+        self.session.mount("https://", adapter)
+        
+        # Posts run off the caller's thread so a slow webhook never stalls the
+        # monitor loop; a single worker keeps notifications in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wechat-notifier")
+    
+    def close(self) -> None:
+        """Wait for queued notifications to finish, then close the HTTP session."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
     
-    def send_notification(self, changes: Dict[str, Any]) -> bool:
+    def send_notification(self, changes: Mapping[str, Any]) -> "Future[bool]":
         """
-        Send notification about repository changes.
+        Queue a notification about repository changes without blocking.
+        
+        The notifier only reads changes and never mutates it, so a read-only
+        view such as types.MappingProxyType can be passed and shared with
+        other consumers without copying.
         
         Args:
-            changes: Dictionary containing change information with keys:
+            changes: Mapping containing change information with keys:
                 - github_new_repos: List of new GitHub repos
                 - github_updated_repos: List of repos with new commits
                 - huggingface_new_models: List of new HuggingFace models
                 - huggingface_updated_models: List of updated models
         
+        Returns:
+            Future resolving to True if sent successfully, False otherwise
+        """
+        future = self._executor.submit(self._send, changes)
+        future.add_done_callback(self._log_unexpected_error)
+        return future
+    
+    def send_notification_sync(self, changes: Mapping[str, Any], timeout: Optional[float] = None) -> bool:
+        """
+        Send notification and wait for the result.
+        
+        Args:
+            changes: Same as send_notification
+            timeout: Seconds to wait for the result, or None (default) to wait
+                until the post finishes. Rate-limit retries, adapter retries
+                and split messages can take well over a minute in total; on
+                timeout the post keeps running in the background
+        
         Returns:
             True if sent successfully, False otherwise
         """
+        try:
+            return self.send_notification(changes).result(timeout=timeout)
+        except FutureTimeoutError:
+            logger.error("Notification not confirmed within %ss, still pending", timeout)
+            return False
+        except Exception:
+            # Already logged by _log_unexpected_error
+            return False
+    
+    @staticmethod
+    def _log_unexpected_error(future: "Future[bool]") -> None:
+        """Log errors _send did not handle, which would otherwise vanish with the future."""
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Unexpected error sending notification", exc_info=future.exception())
+    
+    def _send(self, changes: Mapping[str, Any]) -> bool:
+        """Format and post a notification; runs on the notifier's worker thread."""
         message = self._format_message(changes)
         
         if not message:
             logger.debug("No changes to notify")
             return True
         
-        payload = {
+        if _utf8_len(message) <= _MAX_MESSAGE_BYTES:
+            return self._post(message)
+        
+        # Oversized messages would be rejected after a full round-trip; send
+        # them as several in-limit posts over the same session instead
+        chunks = self._split_message(changes)
+        logger.info("Notification exceeds %s bytes, sending in %s parts", _MAX_MESSAGE_BYTES, len(chunks))
+        sent = True
+        for chunk in chunks:
+            sent = self._post(chunk) and sent
+        return sent
+    
+    def _post(self, message: str) -> bool:
+        """
+        Post one markdown message to the webhook.
+        
+        HTTP-level failures are retried by the session adapter; WeChat's own
+        rate-limit errcode is retried here with exponential backoff and jitter.
+        
+        Returns:
+            True if sent successfully, False otherwise
+        """
+        # Encoded once up front so rate-limit retries resend the same bytes
+        body = dumps({
             "msgtype": "markdown",
             "markdown": {
                 "content": message
             }
-        }
+        })
         
-        try:
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
+        for attempt in range(_RATE_LIMIT_ATTEMPTS):
+            try:
+                response = self.session.post(
+                    self.webhook_url,
+                    data=body,
+                    headers=_JSON_HEADERS,
+                    timeout=(3, 10)
+                )
+                
+                if response.status_code != 200:
+                    logger.error("HTTP error %s: %s", response.status_code, response.text)
+                    return False
+                
                 result = response.json()
                 if result.get("errcode") == 0:
                     logger.info("Notification sent successfully")
                     return True
-                else:
-                    logger.error(f"WeChat API error: {result}")
-                    return False
-            else:
-                logger.error(f"HTTP error {response.status_code}: {response.text}")
+                
+                if result.get("errcode") == _ERRCODE_RATE_LIMITED and attempt < _RATE_LIMIT_ATTEMPTS - 1:
+                    delay = min(30, 2 ** (attempt + 1)) + random.random()
+                    logger.warning("WeChat rate limit hit, retrying in %.1fs", delay)
+                    time.sleep(delay)
+                    continue
+                
+                logger.error("WeChat API error: %s", result)
                 return False
                 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to send notification: {e}")
-            return False
+            except requests.exceptions.RequestException as e:
+                logger.error("Failed to send notification: %s", e)
+                return False
+        
+        return False
     
-    def _format_message(self, changes: Dict[str, Any]) -> str:
+    def _format_message(self, changes: Mapping[str, Any]) -> str:
         """Format changes into markdown message."""
-        sections = []
-        
-        # GitHub new repos
-        if changes.get("github_new_repos"):
-            section = "## 🆕 New GitHub Repositories\n"
-            for repo in changes["github_new_repos"]:
-                org = repo.get('org', '')
-                org_prefix = f"[{org}] " if org else ""
-                section += f"- {org_prefix}[{repo['name']}]({repo['url']})\n"
-            sections.append(section)
-        
-        # GitHub updated repos with commit details
-        if changes.get("github_updated_repos"):
-            section = "## 📝 GitHub Repository Updates\n"
-            for repo in changes["github_updated_repos"]:
-                org = repo.get('org', '')
-                org_prefix = f"[{org}] " if org else ""
-                commit = repo.get('commit', {})
+        # Quiet cycles are the common case; skip all formatting work for them
+        if not any(changes.get(key) for key in _KEYS):
+            return ""
+        
+        sections = [
+            header + "\n" + "\n".join(map(formatter, items))
+            for key, header, formatter in SECTIONS
+            if (items := changes.get(key))
+        ]
+        return "\n\n".join(sections)
+    
+    def _split_message(self, changes: Mapping[str, Any]) -> List[str]:
+        """
+        Format changes into markdown messages that each fit the webhook limit.
+        
+        Lines are packed in display order; a section that continues into the
+        next message repeats its header there.
+        
+        Returns:
+            List of markdown messages, each at most _MAX_MESSAGE_BYTES
+        """
+        messages = []
+        parts: List[str] = []
+        size = 0
+        
+        for key, header, formatter in SECTIONS:
+            items = changes.get(key)
+            if not items:
+                continue
+            
+            current_header = None
+            for item in items:
+                line = formatter(item)
+                line_size = _utf8_len(line) + 1
+                
+                # A new section (or a continued one) starts with its header,
+                # separated from the previous section by a blank line
+                if current_header is None:
+                    prefix = ("\n\n" if parts else "") + header
+                else:
+                    prefix = ""
+                
+                if parts and size + _utf8_len(prefix) + line_size > _MAX_MESSAGE_BYTES:
+                    messages.append("".join(parts))
+                    parts, size = [], 0
+                    prefix = header
                 
-                # Format: [org] repo_name: commit_sha - message (author)
-                commit_sha = commit.get('sha', 'unknown')
-                commit_msg = commit.get('message', 'No message')
-                commit_author = commit.get('author', 'Unknown')
+                if prefix:
+                    parts.append(prefix)
+                    size += _utf8_len(prefix)
+                    current_header = header
                 
-                section += f"- {org_prefix}[{repo['name']}]({repo['url']})\n"
-                section += f"  `{commit_sha}` {commit_msg} *by {commit_author}*\n"
-            sections.append(section)
-        
-        # HuggingFace new models
-        if changes.get("huggingface_new_models"):
-            section = "## 🤗 New HuggingFace Models\n"
-            for model in changes["huggingface_new_models"]:
-                section += f"- [{model['name']}]({model['url']})\n"
-            sections.append(section)
-        
-        # HuggingFace updated models
-        if changes.get("huggingface_updated_models"):
-            section = "## 🔄 HuggingFace Model Updates\n"
-            for model in changes["huggingface_updated_models"]:
-                section += f"- [{model['name']}]({model['url']})\n"
-            sections.append(section)
-        
-        # HuggingFace new datasets
-        if changes.get("huggingface_new_datasets"):
-            section = "## 🗂️ New HuggingFace Datasets\n"
-            for dataset in changes["huggingface_new_datasets"]:
-                section += f"- [{dataset['name']}]({dataset['url']})\n"
-            sections.append(section)
-        
-        # HuggingFace updated datasets
-        if changes.get("huggingface_updated_datasets"):
-            section = "## 🔄 HuggingFace Dataset Updates\n"
-            for dataset in changes["huggingface_updated_datasets"]:
-                section += f"- [{dataset['name']}]({dataset['url']})\n"
-            sections.append(section)
-        
-        return "\n".join(sections) if sections else ""
+                if size + line_size > _MAX_MESSAGE_BYTES:
+                    # A single line too long for any message; cut it to fit
+                    budget = _MAX_MESSAGE_BYTES - size - 4
+                    line = line.encode("utf-8")[:budget].decode("utf-8", "ignore") + "..."
+                    line_size = _utf8_len(line) + 1
+                
+                parts.append("\n" + line)
+                size += line_size
+        
+        if parts:
+            messages.append("".join(parts))
+        return messages